@@ -20,6 +20,37 @@ class ProgressUpdate:
     datum: T.Any = None
 
 
+# smallest change in progress that is worth reporting, i.e. at most ~200 updates
+MIN_PROGRESS_STEP = 0.005
+
+
+def throttle_progress(
+    updates: T.Iterable[ProgressUpdate],
+) -> T.Generator[ProgressUpdate, None, None]:
+    """Drop progress updates that would not visibly move a progress bar.
+
+    Updates carrying a datum, completion and the last update are always kept.
+    """
+    last_progress = None
+    skipped_update = None
+    for update in updates:
+        if (
+            update.datum is None
+            and last_progress is not None
+            and update.progress < 1.0
+            and abs(update.progress - last_progress) < MIN_PROGRESS_STEP
+        ):
+            skipped_update = update
+            continue
+
+        skipped_update = None
+        last_progress = update.progress
+        yield update
+
+    if skipped_update is not None:
+        yield skipped_update
+
+
 class BackgroundJob(QObject):
     progress_changed = Signal(float)
     finished = Signal()
@@ -146,7 +177,8 @@ class JobManager(QObject):
             else:
                 try:
                     outstream = QDataStream(socket)
-                    for update in job:
+                    # jobs may report per frame; only forward visible changes
+                    for update in throttle_progress(job):
                         data = pickle.dumps(update)
                         outstream.writeUInt32(len(data))
                         outstream.writeRawData(data)
@@ -162,7 +194,7 @@ class JobManager(QObject):
 
         else:
             with tqdm(total=1.0) as pbar:
-                for update in job:
+                for update in throttle_progress(job):
                     pbar.n = update.progress
                     pbar.refresh()
 
@@ -0,0 +1,122 @@
+import typing as T
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import numpy.typing as npt
+import pupil_apriltags
+
+TAG_FAMILY = "tag36h11"
+
+
+@dataclass
+class MarkerStore:
+    """Marker detections of all scene frames, stored as flat arrays.
+
+    The detections of frame `i` are the rows `offsets[i]:offsets[i + 1]` of every
+    per-detection array. `centers` are the detector's homography centers, while
+    `corner_centers` are the means of the corners, which the UI places markers at.
+    """
+
+    offsets: npt.NDArray[np.int64]
+    ids: npt.NDArray[np.int32]
+    corners: npt.NDArray[np.float64]
+    centers: npt.NDArray[np.float64]
+    corner_centers: npt.NDArray[np.float64]
+    homographies: npt.NDArray[np.float64]
+    hamming: npt.NDArray[np.int32]
+    decision_margins: npt.NDArray[np.float32]
+
+    @classmethod
+    def empty(cls) -> "MarkerStore":
+        return cls.from_detections([])
+
+    @classmethod
+    def from_detections(
+        cls, detections_by_frame: T.Sequence[T.Sequence[pupil_apriltags.Detection]]
+    ) -> "MarkerStore":
+        detections = [d for frame in detections_by_frame for d in frame]
+        counts = [len(frame) for frame in detections_by_frame]
+        corners = np.array(
+            [d.corners for d in detections], dtype=np.float64
+        ).reshape(-1, 4, 2)
+
+        return cls(
+            offsets=np.concatenate(([0], np.cumsum(counts, dtype=np.int64))),
+            ids=np.array([d.tag_id for d in detections], dtype=np.int32),
+            corners=corners,
+            centers=np.array(
+                [d.center for d in detections], dtype=np.float64
+            ).reshape(-1, 2),
+            corner_centers=corners.mean(axis=1),
+            homographies=np.array(
+                [d.homography for d in detections], dtype=np.float64
+            ).reshape(-1, 3, 3),
+            hamming=np.array([d.hamming for d in detections], dtype=np.int32),
+            decision_margins=np.array(
+                [d.decision_margin for d in detections], dtype=np.float32
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "MarkerStore":
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in data.files}
+
+        # caches written before corner centers were stored
+        if "corner_centers" not in arrays:
+            arrays["corner_centers"] = arrays["corners"].mean(axis=1)
+
+        return cls(**arrays)
+
+    def save(self, path: Path) -> None:
+        with path.open("wb") as f:
+            np.savez(f, **vars(self))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, frame_idx: int) -> list[pupil_apriltags.Detection]:
+        """Build detection objects for a frame, e.g. for the marker mapper."""
+        start, stop = self._frame_range(frame_idx)
+
+        detections = []
+        for idx in range(start, stop):
+            detection = pupil_apriltags.Detection()
+            detection.tag_family = TAG_FAMILY.encode()
+            detection.tag_id = int(self.ids[idx])
+            detection.hamming = int(self.hamming[idx])
+            detection.decision_margin = float(self.decision_margins[idx])
+            detection.homography = self.homographies[idx]
+            detection.center = self.centers[idx]
+            detection.corners = self.corners[idx]
+            detection.pose_R = None
+            detection.pose_t = None
+            detection.pose_err = None
+            detections.append(detection)
+
+        return detections
+
+    def ids_for_frame(self, frame_idx: int) -> npt.NDArray[np.int32]:
+        return self.ids[slice(*self._frame_range(frame_idx))]
+
+    def corners_for_frame(self, frame_idx: int) -> npt.NDArray[np.float64]:
+        return self.corners[slice(*self._frame_range(frame_idx))]
+
+    def centers_for_frame(self, frame_idx: int) -> npt.NDArray[np.float64]:
+        return self.centers[slice(*self._frame_range(frame_idx))]
+
+    def corner_centers_for_frame(self, frame_idx: int) -> npt.NDArray[np.float64]:
+        return self.corner_centers[slice(*self._frame_range(frame_idx))]
+
+    def counts(self) -> npt.NDArray[np.int64]:
+        return np.diff(self.offsets)
+
+    def _frame_range(self, frame_idx: int) -> tuple[int, int]:
+        if frame_idx < 0:
+            frame_idx += len(self)
+
+        if not 0 <= frame_idx < len(self):
+            raise IndexError(f"frame index {frame_idx} out of range")
+
+        return int(self.offsets[frame_idx]), int(self.offsets[frame_idx + 1])
@@ -1,9 +1,14 @@
+import copy
 import json
 import logging
+import os
 import pickle
 import shutil
+import threading
 import typing as T
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from itertools import starmap
 from pathlib import Path
 
@@ -17,7 +22,7 @@ from pupil_labs.camera import Camera, perspective_transform
 from pupil_labs.marker_mapper import Surface, utils
 from pupil_labs.marker_mapper.surface import normalized_corners
 from pupil_labs.neon_recording import NeonRecording
-from PySide6.QtCore import QPointF, Qt, QTimer
+from PySide6.QtCore import QPointF, QRect, Qt, QTimer
 from PySide6.QtGui import (
     QColor,
     QColorConstants,
@@ -26,6 +31,7 @@ from PySide6.QtGui import (
     QPainter,
     QPainterPath,
     QPen,
+    QPolygonF,
 )
 from PySide6.QtWidgets import (
     QDialog,
@@ -49,9 +55,13 @@ from pupil_labs.neon_player.utilities import (
     qimage_from_frame,
 )
 
+from .markers import TAG_FAMILY, MarkerStore
 from .tracked_surface import TrackedSurface
 from .ui import MarkerEditWidget
 
+# overlays are only drawn when the current time is within 1/30 s of a scene frame
+MAX_FRAME_TIME_OFFSET_NS = 1_000_000_000 // 30
+
 
 class SurfaceImportDialog(QDialog):
     def __init__(self, surfaces_to_import, existing_surfaces, import_callback, parent=None):
@@ -126,17 +136,24 @@ class SurfaceTrackingPlugin(Plugin):
 
     def __init__(self) -> None:
         super().__init__()
-        self.marker_cache_file = self.get_cache_path() / "markers.npy"
+        self.marker_cache_file = self.get_cache_path() / "markers.npz"
         self.surface_cache_file = self.get_cache_path() / "surfaces.npy"
 
         self._draw_marker_ids = False
         self._draw_names = True
         self._export_overlays = False
 
-        self.markers_by_frame: list[list] = []
+        self.markers_by_frame = MarkerStore.empty()
+        self._marker_polygon_cache = None
+        self._surface_outline_cache: dict[str, tuple] = {}
+        self._heatmap_color_cache: dict[str, tuple] = {}
+        self._heatmap_map_cache: dict[str, tuple] = {}
+        self._text_rect_cache = {}
         self.surface_locations: dict[str, list] = {}
 
         self._surfaces: list[TrackedSurface] = []
+        # surfaces without a locations cache wait here until markers are loaded
+        self._surfaces_awaiting_markers: list[TrackedSurface] = []
 
         self.marker_edit_widgets = {}
         self.header_action = ListPropertyAppenderAction("surfaces", "+ Add surface")
@@ -178,8 +195,13 @@ class SurfaceTrackingPlugin(Plugin):
 
     def _update_editing_markers(self) -> None:
         frame_idx = self.get_scene_idx_for_time()
-        markers = self.markers_by_frame[frame_idx]
-        present_markers = {m.tag_id: m for m in markers}
+        marker_centers = dict(
+            zip(
+                self.markers_by_frame.ids_for_frame(frame_idx).tolist(),
+                self.markers_by_frame.corner_centers_for_frame(frame_idx),
+                strict=True,
+            )
+        )
         vrw = self.app.main_window.video_widget
         edit_surface = next((s for s in self._surfaces if s.edit), None)
         if edit_surface is not None and edit_surface.location is None:
@@ -192,12 +214,11 @@ class SurfaceTrackingPlugin(Plugin):
             return
 
         for marker_uid, marker_widget in self.marker_edit_widgets.items():
-            if marker_uid not in present_markers:
+            if marker_uid not in marker_centers:
                 marker_widget.hide()
             else:
                 marker_widget.show()
-                marker = present_markers[marker_uid]
-                distorted_center = np.mean(marker.corners, axis=0)
+                distorted_center = marker_centers[marker_uid]
 
                 vrw.set_child_scaled_center(
                     marker_widget, distorted_center[0], distorted_center[1]
@@ -210,9 +231,33 @@ class SurfaceTrackingPlugin(Plugin):
             self.recording.calibration.scene_camera_matrix,
             self.recording.calibration.scene_distortion_coefficients,
         )
+        # distorted scene coordinates for every pixel of the undistorted image, so
+        # whole grids of points can be distorted with a single lookup
+        self.distortion_lookup_maps = cv2.initUndistortRectifyMap(
+            self.recording.calibration.scene_camera_matrix,
+            self.recording.calibration.scene_distortion_coefficients,
+            None,
+            self.recording.calibration.scene_camera_matrix,
+            (recording.scene.width, recording.scene.height),
+            cv2.CV_32FC1,
+        )
+        # and the reverse: undistorted coordinates of every distorted scene pixel,
+        # built here rather than on the first heatmap paint
+        self.undistortion_lookup_maps = cv2.initInverseRectificationMap(
+            self.recording.calibration.scene_camera_matrix,
+            self.recording.calibration.scene_distortion_coefficients,
+            None,
+            self.recording.calibration.scene_camera_matrix,
+            (recording.scene.width, recording.scene.height),
+            cv2.CV_32FC1,
+        )
+        self._marker_polygon_cache = None
+        self._surface_outline_cache = {}
+        self._heatmap_map_cache = {}
         self.attempt_marker_cache_load()
 
     def attempt_marker_cache_load(self) -> None:
+        self._migrate_legacy_marker_cache()
         if self.marker_cache_file.exists():
             self._load_marker_cache()
             return
@@ -227,6 +272,23 @@ class SurfaceTrackingPlugin(Plugin):
             )
             self.marker_detection_job.finished.connect(self._load_marker_cache)
 
+    def _migrate_legacy_marker_cache(self) -> None:
+        # older versions pickled the detections of every frame into an object array
+        legacy_path = self.marker_cache_file.with_suffix(".npy")
+        if not legacy_path.exists():
+            return
+
+        if not self.marker_cache_file.exists():
+            try:
+                detections_by_frame = np.load(legacy_path, allow_pickle=True)
+                markers = MarkerStore.from_detections(detections_by_frame)
+            except Exception:
+                logging.exception(f"Failed to convert {legacy_path}")
+            else:
+                markers.save(self.marker_cache_file)
+
+        legacy_path.unlink()
+
     def render(self, painter: QPainter, time_in_recording: int) -> None:  # noqa: C901
         self._update_displays()
         if not self._export_overlays:
@@ -238,8 +300,9 @@ class SurfaceTrackingPlugin(Plugin):
         if frame_idx < 0:
             return
 
-        scene_frame = self.recording.scene.sample([time_in_recording])[0]
-        if abs(time_in_recording - scene_frame.time) / 1e9 > 1 / 30:
+        # only the frame timestamp is needed here, so skip sampling the frame
+        scene_time = self.recording.scene.time[frame_idx]
+        if abs(time_in_recording - scene_time) > MAX_FRAME_TIME_OFFSET_NS:
             return
 
         # Render markers
@@ -248,8 +311,8 @@ class SurfaceTrackingPlugin(Plugin):
         font.setPointSize(24)
         painter.setFont(font)
         if frame_idx < len(self.markers_by_frame):
-            for marker in self.markers_by_frame[frame_idx]:
-                self._distort_and_draw_marker(painter, marker.corners, marker.tag_id)
+            for marker_id, polygon, center in self._get_marker_polygons(frame_idx):
+                self._draw_marker(painter, polygon, center, marker_id)
 
         for surface in self.surfaces:
             if surface.uid not in self.surface_locations:
@@ -264,49 +327,12 @@ class SurfaceTrackingPlugin(Plugin):
             if surface.tracker_surface is None:
                 continue
 
-            show_heatmap = surface.show_heatmap and surface.heatmap_alpha > 0.0
+            # below one 8-bit level the heatmap would not change a single pixel
+            show_heatmap = surface.show_heatmap and surface.heatmap_alpha >= 1 / 255
             if show_heatmap and surface._heatmap is not None:
                 export_window = self.app.recording_settings.export_window
                 if export_window[0] <= time_in_recording <= export_window[1]:
-                    scalar = np.float64([
-                        [1 / surface._heatmap.shape[1], 0.0, 0.0],
-                        [0.0, 1 / surface._heatmap.shape[0], 0.0],
-                        [0.0, 0.0, 1.0],
-                    ])
-
-                    heatmap_to_scene = location[1] @ scalar
-                    scene_size = self.recording.scene.width, self.recording.scene.height
-
-                    rgb_heatmap = cv2.applyColorMap(
-                        surface._heatmap, surface.heatmap_color.value
-                    )
-                    rgb_heatmap = cv2.cvtColor(rgb_heatmap, cv2.COLOR_BGR2RGB)
-                    undistorted_heatmap = cv2.warpPerspective(
-                        rgb_heatmap,
-                        heatmap_to_scene,
-                        scene_size,
-                    )
-                    undistorted_mask = cv2.warpPerspective(
-                        255
-                        * np.ones(
-                            (surface._heatmap.shape[0], surface._heatmap.shape[1]),
-                            dtype="uint8",
-                        ),
-                        heatmap_to_scene,
-                        scene_size,
-                    )
-
-                    # @TODO: use optimal matrix to have less edge truncation
-                    distorted_heatmap = self.camera.distort_image(undistorted_heatmap)
-                    distorted_mask = self.camera.distort_image(undistorted_mask)
-                    distorted_heatmap_rgba = np.dstack((
-                        distorted_heatmap,
-                        distorted_mask,
-                    ))
-
-                    painter.setOpacity(surface.heatmap_alpha)
-                    painter.drawImage(0, 0, qimage_from_frame(distorted_heatmap_rgba))
-                    painter.setOpacity(1.0)
+                    self._draw_heatmap(painter, surface, location)
 
             anchors = None
             if surface.edit and surface.handle_widgets:
@@ -322,14 +348,11 @@ class SurfaceTrackingPlugin(Plugin):
                     pass
 
             if anchors is None:
-                if surface.location is None:
-                    return
-                anchors = perspective_transform(
-                    normalized_corners(),
-                    surface.location[1],
-                )
+                points = self._get_surface_outline(surface.uid, location)
+            else:
+                points = self._distort_points(insert_interpolated_points(anchors))
 
-            points = self._distort_and_trace_surface(painter, anchors)
+            self._trace_surface_outline(painter, points)
 
             if self._draw_names:
                 old_pen = painter.pen()
@@ -343,7 +366,7 @@ class SurfaceTrackingPlugin(Plugin):
                 path = QPainterPath()
                 painter.setPen(pen)
                 center = np.mean(points[0:-1], axis=0)
-                text_rect = painter.fontMetrics().boundingRect(surface.name)
+                text_rect = self._text_rect(painter, surface.name)
                 path.addText(
                     int(center[0] - text_rect.width() / 2),
                     int(center[1] + text_rect.height() / 2) - 8,
@@ -358,22 +381,100 @@ class SurfaceTrackingPlugin(Plugin):
                 painter.setPen(old_pen)
                 painter.setBrush(old_brush)
 
-    def _distort_and_trace_surface(
+    def _draw_heatmap(self, painter: QPainter, surface: TrackedSurface, location):
+        heatmap_maps = self._get_heatmap_maps(surface, location)
+        if heatmap_maps is None:
+            return
+
+        # the alpha channel doubles as the mask of the area covered by the surface
+        heatmap = surface._heatmap
+        color_map = surface.heatmap_color.value
+        cached = self._heatmap_color_cache.get(surface.uid)
+        if cached is None or cached[0] is not heatmap or cached[1] != color_map:
+            rgba_heatmap = cv2.cvtColor(
+                cv2.applyColorMap(heatmap, color_map), cv2.COLOR_BGR2RGBA
+            )
+            cached = (heatmap, color_map, rgba_heatmap)
+            self._heatmap_color_cache[surface.uid] = cached
+
+        (x0, y0), map_xy, map_interpolation = heatmap_maps
+        distorted_heatmap = cv2.remap(
+            cached[2],
+            map_xy,
+            map_interpolation,
+            interpolation=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_CONSTANT,
+        )
+
+        painter.setOpacity(surface.heatmap_alpha)
+        painter.drawImage(int(x0), int(y0), qimage_from_frame(distorted_heatmap))
+        painter.setOpacity(1.0)
+
+    def _get_heatmap_maps(self, surface: TrackedSurface, location) -> tuple | None:
+        # every distorted scene pixel is traced back to the heatmap pixel it shows,
+        # so the heatmap is resampled once and only within the surface's outline.
+        # The maps only depend on the frame's location and the heatmap size, so
+        # repaints of a frame reuse them
+        heatmap_shape = surface._heatmap.shape[:2]
+        cached = self._heatmap_map_cache.get(surface.uid)
+        if cached is not None and cached[0] is location and cached[1] == heatmap_shape:
+            return cached[2]
+
+        outline = self._get_surface_outline(surface.uid, location)
+        scene_size = self.recording.scene.width, self.recording.scene.height
+        x0, y0 = np.maximum(np.floor(outline.min(axis=0)).astype(int) - 1, 0)
+        x1, y1 = np.minimum(np.ceil(outline.max(axis=0)).astype(int) + 2, scene_size)
+        if x1 <= x0 or y1 <= y0:
+            heatmap_maps = None
+        else:
+            heatmap_to_scene = location[1] @ np.float64([
+                [1 / heatmap_shape[1], 0.0, 0.0],
+                [0.0, 1 / heatmap_shape[0], 0.0],
+                [0.0, 0.0, 1.0],
+            ])
+
+            map_x, map_y = self.undistortion_lookup_maps
+            undistorted_points = np.dstack(
+                (map_x[y0:y1, x0:x1], map_y[y0:y1, x0:x1])
+            )
+            heatmap_points = cv2.perspectiveTransform(
+                undistorted_points, np.linalg.inv(heatmap_to_scene)
+            )
+            heatmap_maps = (
+                (x0, y0),
+                *cv2.convertMaps(heatmap_points, None, cv2.CV_16SC2),
+            )
+
+        self._heatmap_map_cache[surface.uid] = (location, heatmap_shape, heatmap_maps)
+
+        return heatmap_maps
+
+    def _get_surface_outline(self, surface_uid: str, location) -> npt.NDArray:
+        # repaints of a frame and the heatmap ROI share one outline; location
+        # tuples are created once per frame, so identity tells when it is stale
+        cached = self._surface_outline_cache.get(surface_uid)
+        if cached is not None and cached[0] is location:
+            return cached[1]
+
+        corners = perspective_transform(normalized_corners(), location[1])
+        outline = self._distort_points(insert_interpolated_points(corners))
+        self._surface_outline_cache[surface_uid] = (location, outline)
+
+        return outline
+
+    def _trace_surface_outline(
         self,
         painter: QPainter,
-        anchors,
+        points: npt.NDArray,
         resolution=10,
-    ) -> np.ndarray:
-        points = insert_interpolated_points(anchors, resolution)
-        points = self.camera.distort_points(points)
-
+    ) -> None:
         pen = painter.pen()
         pen.setWidth(5)
         pen.setColor("#039be5")
         pen.setCapStyle(Qt.PenCapStyle.FlatCap)
         painter.setPen(pen)
 
-        qpoints = list(starmap(QPointF, points))
+        qpoints = qpoints_from_array(points)
         for seg_idx in [1, 2, 3, 0]:
             if seg_idx == 0:
                 pen.setColor("#ff0000")
@@ -384,22 +485,94 @@ class SurfaceTrackingPlugin(Plugin):
 
             painter.drawPolyline(qpoints[start_idx:end_idx])
 
-        return points
+    def _get_marker_polygons(self, frame_idx: int) -> list:
+        # paint events repeat for the same frame (e.g. on resizes and mouse moves),
+        # so the distorted outlines of the last painted frame are kept as Qt polygons
+        if self._marker_polygon_cache is not None:
+            cached_frame_idx, cached_polygons = self._marker_polygon_cache
+            if cached_frame_idx == frame_idx:
+                return cached_polygons
+
+        marker_polygons = []
+        marker_corners = self.markers_by_frame.corners_for_frame(frame_idx)
+        if len(marker_corners) > 0:
+            marker_ids = self.markers_by_frame.ids_for_frame(frame_idx).tolist()
+            polygons = self._distort_marker_polygons(marker_corners)
+            marker_polygons = [
+                (
+                    marker_id,
+                    QPolygonF(qpoints_from_array(polygon)),
+                    np.mean(polygon[0:-1], axis=0),
+                )
+                for marker_id, polygon in zip(marker_ids, polygons, strict=True)
+            ]
+
+        self._marker_polygon_cache = (frame_idx, marker_polygons)
+
+        return marker_polygons
+
+    def _distort_marker_polygons(
+        self,
+        corners: npt.NDArray,
+        resolution=10,
+    ) -> npt.NDArray:
+        # all markers of a frame go through the camera together, which keeps it
+        # at two camera calls per frame instead of two per marker
+        if resolution <= 0:
+            return corners
+
+        n_markers = len(corners)
+        points = self.camera.undistort_points(corners.reshape(-1, 2))
+        points = points.reshape(n_markers, -1, 2)
+        points = insert_interpolated_points(points, resolution)
+        points = self._distort_points(points.reshape(-1, 2))
+
+        return points.reshape(n_markers, -1, 2)
+
+    def _distort_points(self, points: npt.NDArray) -> npt.NDArray:
+        # overlay outlines are distorted many times per repaint, so points within
+        # the scene image are looked up in the distortion table instead of going
+        # through the camera model, which is only used for points outside of it
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        height, width = self.distortion_lookup_maps[0].shape
+        inside = (
+            (points[:, 0] >= 0)
+            & (points[:, 0] <= width - 1)
+            & (points[:, 1] >= 0)
+            & (points[:, 1] <= height - 1)
+        )
+
+        distorted = np.empty_like(points)
+        if inside.any():
+            lookup_points = points[inside].astype(np.float32).reshape(1, -1, 2)
+            for axis, lookup_map in enumerate(self.distortion_lookup_maps):
+                distorted[inside, axis] = cv2.remap(
+                    lookup_map, lookup_points, None, interpolation=cv2.INTER_LINEAR
+                ).ravel()
 
-    def _distort_and_draw_marker(
+        if not inside.all():
+            distorted[~inside] = self.camera.distort_points(points[~inside])
+
+        return distorted
+
+    def _text_rect(self, painter: QPainter, text: str) -> QRect:
+        # labels are drawn on every paint with the same few fonts and texts; the
+        # metrics also depend on the resolution of the device painted on
+        key = (painter.font().key(), painter.device().logicalDpiY(), text)
+        if key not in self._text_rect_cache:
+            self._text_rect_cache[key] = painter.fontMetrics().boundingRect(text)
+
+        return self._text_rect_cache[key]
+
+    def _draw_marker(
         self,
         painter: QPainter,
-        points,
+        polygon: QPolygonF,
+        center: npt.NDArray,
         marker_id,
-        resolution=10,
     ) -> None:
         marker_id = str(marker_id)
 
-        if resolution > 0:
-            points = self.camera.undistort_points(points)
-            points = insert_interpolated_points(points, resolution)
-            points = self.camera.distort_points(points)
-
         color = QColor("#00ff00")
 
         pen = painter.pen()
@@ -409,7 +582,7 @@ class SurfaceTrackingPlugin(Plugin):
 
         color.setAlpha(200)
         painter.setBrush(color)
-        painter.drawPolygon(list(starmap(QPointF, points)))
+        painter.drawPolygon(polygon)
 
         if self._draw_marker_ids:
             old_pen = painter.pen()
@@ -420,11 +593,8 @@ class SurfaceTrackingPlugin(Plugin):
             pen.setJoinStyle(Qt.RoundJoin)
             painter.setPen(pen)
 
-            text_rect = painter.fontMetrics().boundingRect(marker_id)
-            center = np.mean(points[0:-1], axis=0)
-
             path = QPainterPath()
-            text_rect = painter.fontMetrics().boundingRect(marker_id)
+            text_rect = self._text_rect(painter, marker_id)
             path.addText(
                 int(center[0] - text_rect.width() / 2),
                 int(center[1] + text_rect.height() / 2) - 8,
@@ -438,20 +608,18 @@ class SurfaceTrackingPlugin(Plugin):
             painter.setPen(old_pen)
 
     def _load_marker_cache(self) -> None:
-        self.markers_by_frame = np.load(self.marker_cache_file, allow_pickle=True)
+        self.markers_by_frame = MarkerStore.load(self.marker_cache_file)
+        self._marker_polygon_cache = None
         self.trigger_scene_update()
-        for frame_markers in self.markers_by_frame:
-            for marker in frame_markers:
-                if marker.tag_id not in self.marker_edit_widgets:
-                    widget = MarkerEditWidget(marker.tag_id)
-                    widget.setParent(self.app.main_window.video_widget)
-                    widget.hide()
-                    self.marker_edit_widgets[marker.tag_id] = widget
+        for marker_id in np.unique(self.markers_by_frame.ids).tolist():
+            if marker_id not in self.marker_edit_widgets:
+                widget = MarkerEditWidget(marker_id)
+                widget.setParent(self.app.main_window.video_widget)
+                widget.hide()
+                self.marker_edit_widgets[marker_id] = widget
 
         # marker visibility plot
-        marker_count_by_frame = np.array(
-            [len(v) for v in self.markers_by_frame], dtype=np.int32
-        )
+        marker_count_by_frame = self.markers_by_frame.counts()
         change_indices = np.where(np.diff(marker_count_by_frame) != 0)[0]
         start_indices = np.concatenate(([0], change_indices + 1))
         stop_indices = np.concatenate((
@@ -473,6 +641,31 @@ class SurfaceTrackingPlugin(Plugin):
             ],
         )
 
+        awaiting_surfaces = self._surfaces_awaiting_markers
+        self._surfaces_awaiting_markers = []
+        for surface in awaiting_surfaces:
+            if surface in self._surfaces:
+                self._start_bg_surface_locator(surface)
+
+    def _migrate_legacy_locations_cache(self, surface_uid: str) -> None:
+        # older versions pickled the per-frame location tuples into an object array
+        legacy_path = self.get_cache_path() / f"{surface_uid}_locations.npy"
+        if not legacy_path.exists():
+            return
+
+        locations_path = self.get_cache_path() / f"{surface_uid}_locations.npz"
+        if not locations_path.exists():
+            try:
+                locations = np.load(legacy_path, allow_pickle=True)
+                location_arrays = locations_to_arrays(locations)
+            except Exception:
+                logging.exception(f"Failed to convert {legacy_path}")
+            else:
+                with locations_path.open("wb") as f:
+                    np.savez(f, **location_arrays)
+
+        legacy_path.unlink()
+
     def _load_surface_locations_cache(self, surface_uid: str) -> None:
         surface = self.get_surface(surface_uid)
         surf_path = self.get_cache_path() / f"{surface_uid}_surface.pkl"
@@ -480,13 +673,10 @@ class SurfaceTrackingPlugin(Plugin):
             with surf_path.open("rb") as f:
                 surface.tracker_surface = pickle.load(f)  # noqa: S301
 
-        locations_path = self.get_cache_path() / f"{surface_uid}_locations.npy"
+        locations_path = self.get_cache_path() / f"{surface_uid}_locations.npz"
         if locations_path.exists():
-            data = np.load(locations_path, allow_pickle=True)
-            self.surface_locations[surface_uid] = [
-                None if location is None else tuple(np.array(v, dtype=np.float64) for v in location)
-                for location in data
-            ]
+            with np.load(locations_path) as data:
+                self.surface_locations[surface_uid] = arrays_to_locations(data)
 
             if surface.preview_options.render_size == [0, 0]:
                 surface2image = self.surface_locations[surface_uid][surface.defining_frame_index][1]
@@ -572,13 +762,19 @@ class SurfaceTrackingPlugin(Plugin):
     ) -> T.Generator[ProgressUpdate, None, None]:
         surface = self.get_surface(surface_uid)
 
+        # timestamps are sorted, so time ranges are found by binary search
+        # instead of scanning the whole stream for every frame
+        scene_time = self.recording.scene.time
+        gaze_time = self.recording.gaze.time
+
         start_time, stop_time = neon_player.instance().recording_settings.export_window
-        start_mask = self.recording.scene.time >= start_time
-        stop_mask = self.recording.scene.time <= stop_time
-        scene_frames = self.recording.scene[start_mask & stop_mask]
+        scene_start_idx = np.searchsorted(scene_time, start_time, side="left")
+        scene_stop_idx = np.searchsorted(scene_time, stop_time, side="right")
+        scene_frames = self.recording.scene[scene_start_idx:scene_stop_idx]
 
-        mapped_gazes = np.empty((0, 2), dtype=np.float32)
-        gaze_ons = np.zeros([len(self.recording.scene)], dtype=np.uint8)
+        mapped_gaze_chunks = []
+        # leading zero so that np.diff marks a gaze-on at the first frame as a start
+        gaze_ons = np.zeros([len(self.recording.scene) + 1], dtype=np.int8)
 
         for idx, frame in enumerate(scene_frames):
             location = self.surface_locations[surface_uid][frame.index]
@@ -589,23 +785,30 @@ class SurfaceTrackingPlugin(Plugin):
 
             start_time = frame.time
             if frame.index < len(self.recording.scene) - 1:
-                stop_time = self.recording.scene[frame.index + 1].time
+                stop_time = scene_time[frame.index + 1]
             else:
                 stop_time = start_time + 1e9 / 30
 
-            start_mask = self.recording.gaze.time >= start_time
-            stop_mask = self.recording.gaze.time <= stop_time
+            gaze_start_idx = np.searchsorted(gaze_time, start_time, side="left")
+            gaze_stop_idx = np.searchsorted(gaze_time, stop_time, side="right")
 
-            gazes = self.recording.gaze[start_mask & stop_mask]
+            gazes = self.recording.gaze[gaze_start_idx:gaze_stop_idx]
             if len(gazes) > 0:
                 frame_gazes = surface.apply_offset_and_map_gazes(gazes)
-                mapped_gazes = np.append(mapped_gazes, frame_gazes, axis=0)
+                mapped_gaze_chunks.append(frame_gazes)
 
                 valid_rows = np.all((frame_gazes >= 0) & (frame_gazes <= 1), axis=1)
-                gaze_ons[idx] = np.any(valid_rows)
+                gaze_ons[idx + 1] = np.any(valid_rows)
 
             yield ProgressUpdate((1 + idx) / len(scene_frames))
 
+        # gazes are collected per frame and joined once, appending to one array
+        # would copy everything collected so far on every frame
+        if mapped_gaze_chunks:
+            mapped_gazes = np.concatenate(mapped_gaze_chunks, axis=0)
+        else:
+            mapped_gazes = np.empty((0, 2), dtype=np.float32)
+
         lower_pass = np.all(mapped_gazes >= 0.0, axis=1)
         upper_pass = np.all(mapped_gazes <= 1.0, axis=1)
         surface_gazes = mapped_gazes[lower_pass & upper_pass]
@@ -623,11 +826,13 @@ class SurfaceTrackingPlugin(Plugin):
             max(1, int(resolution * aspect_ratio)),
         )
 
-        xvals, yvals = surface_gazes[:, 0], surface_gazes[:, 1]
-
-        hist, *_ = np.histogram2d(
-            yvals, xvals, bins=grid, range=[[0, 1.0], [0, 1.0]], density=False
-        )
+        # gazes are already limited to the surface, so binning reduces to
+        # quantizing them and counting flat bin indices
+        rows = np.minimum((surface_gazes[:, 1] * grid[0]).astype(np.intp), grid[0] - 1)
+        cols = np.minimum((surface_gazes[:, 0] * grid[1]).astype(np.intp), grid[1] - 1)
+        hist = np.bincount(rows * grid[1] + cols, minlength=grid[0] * grid[1])
+        # single precision is plenty for counts and halves the blur's memory traffic
+        hist = hist.reshape(grid).astype(np.float32)
         filter_h = 19 + blur_factor * 15
         filter_w = filter_h * aspect_ratio
         filter_h = int(filter_h) // 2 * 2 + 1
@@ -642,7 +847,6 @@ class SurfaceTrackingPlugin(Plugin):
         cv2.imwrite(str(cache_file), hist)
 
         # gaze on cache for timeline
-        gaze_ons = np.concatenate([[0], gaze_ons])
         gaze_diff = np.diff(gaze_ons)
         start_times = self.recording.scene.time[gaze_diff == 1].tolist()
         stop_times = self.recording.scene.time[gaze_diff == -1].tolist()
@@ -707,15 +911,21 @@ class SurfaceTrackingPlugin(Plugin):
     @surfaces.setter
     def surfaces(self, value: list["TrackedSurface"]):  # noqa: C901
         frame_idx = self.get_scene_idx_for_time()
-        new_surfaces = [surface for surface in value if surface not in self._surfaces]
+        # surfaces are told apart by identity, since fresh ones have no uid yet
+        current_ids = {id(surface) for surface in self._surfaces}
+        value_ids = {id(surface) for surface in value}
+        new_surfaces = [surface for surface in value if id(surface) not in current_ids]
         removed_surfaces = [
-            surface for surface in self._surfaces if surface not in value
+            surface for surface in self._surfaces if id(surface) not in value_ids
         ]
 
         fresh_surfaces = [s for s in new_surfaces if s.uid == ""]
         if len(fresh_surfaces) > 0:
             frame_detect_done = frame_idx < len(self.markers_by_frame)
-            if not frame_detect_done or len(self.markers_by_frame[frame_idx]) < 1:
+            if (
+                not frame_detect_done
+                or len(self.markers_by_frame.ids_for_frame(frame_idx)) < 1
+            ):
                 QMessageBox.warning(
                     self.app.main_window,
                     "No markers detected",
@@ -729,7 +939,8 @@ class SurfaceTrackingPlugin(Plugin):
         self._surfaces = value
 
         for surface in new_surfaces:
-            if surface.uid == "":
+            is_fresh = surface.uid == ""
+            if is_fresh:
                 surface.uid = str(uuid.uuid4())
 
             surface_counter = 1
@@ -751,13 +962,20 @@ class SurfaceTrackingPlugin(Plugin):
                 lambda s=surface: self.on_locations_invalidated(s)
             )
 
-            locations_path = self.get_cache_path() / f"{surface.uid}_locations.npy"
+            self._migrate_legacy_locations_cache(surface.uid)
+            locations_path = self.get_cache_path() / f"{surface.uid}_locations.npz"
             if locations_path.exists():
                 self._load_surface_locations_cache(surface.uid)
 
             elif not self.app.headless:
-                surface.defining_frame_index = int(frame_idx)
-                self._start_bg_surface_locator(surface)
+                # existing surfaces keep the frame they were defined on
+                if is_fresh:
+                    surface.defining_frame_index = int(frame_idx)
+
+                if len(self.markers_by_frame) > 0:
+                    self._start_bg_surface_locator(surface)
+                else:
+                    self._surfaces_awaiting_markers.append(surface)
 
         for surface in removed_surfaces:
             if surface.edit:
@@ -768,6 +986,7 @@ class SurfaceTrackingPlugin(Plugin):
 
             surface_files = [
                 "surface.pkl",
+                "locations.npz",
                 "locations.npy",
                 "heatmap.png",
                 "surface_visibility.pkl",
@@ -799,7 +1018,7 @@ class SurfaceTrackingPlugin(Plugin):
                 w.hide()
 
     def on_locations_invalidated(self, surface: "TrackedSurface") -> None:
-        locations_path = self.get_cache_path() / f"{surface.uid}_locations.npy"
+        locations_path = self.get_cache_path() / f"{surface.uid}_locations.npz"
         if locations_path.exists():
            locations_path.unlink()
 
@@ -831,22 +1050,50 @@ class SurfaceTrackingPlugin(Plugin):
 
     def bg_detect_markers(self) -> T.Generator[ProgressUpdate, None, None]:
         logging.info("Detecting markers...")
-        detector = pupil_apriltags.Detector(
-            families="tag36h11", nthreads=2, quad_decimate=2.0, decode_sharpening=1.0
-        )
+        # frames are independent, so detection is spread over a pool of threads.
+        # The detector releases the GIL while it runs, but a single instance
+        # must not be shared between threads
+        thread_state = threading.local()
+
+        # decimation follows the scene resolution, anchored at 2x for the 1600 px
+        # wide Neon scene camera, so small videos keep detail for far markers and
+        # large ones don't pay for needless full-resolution quad detection
+        quad_decimate = float(np.clip(self.recording.scene.width / 800, 1.0, 4.0))
+
+        def detect(image: npt.NDArray) -> list:
+            if not hasattr(thread_state, "detector"):
+                thread_state.detector = pupil_apriltags.Detector(
+                    families=TAG_FAMILY,
+                    nthreads=1,
+                    quad_decimate=quad_decimate,
+                    decode_sharpening=1.0,
+                )
+
+            return thread_state.detector.detect(image)
+
+        n_workers = max(1, (os.cpu_count() or 2) // 2)
+        n_frames = len(self.recording.scene)
 
         markers_by_frame = []
-        for frame_idx, frame in enumerate(self.recording.scene):
-            # @TODO: apply brightness/contrast adjustments
-            markers_by_frame.append(detector.detect(frame.gray))
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for frame in self.recording.scene:
+                # @TODO: apply brightness/contrast adjustments
+                pending.append(executor.submit(detect, frame.gray))
 
-            yield ProgressUpdate((frame_idx + 1) / len(self.recording.scene))
+                # limit the number of decoded frames waiting for a worker
+                if len(pending) >= 2 * n_workers:
+                    markers_by_frame.append(pending.popleft().result())
+                    yield ProgressUpdate(len(markers_by_frame) / n_frames)
+
+            while pending:
+                markers_by_frame.append(pending.popleft().result())
+                yield ProgressUpdate(len(markers_by_frame) / n_frames)
 
         self.marker_cache_file.parent.mkdir(parents=True, exist_ok=True)
-        with self.marker_cache_file.open("wb") as f:
-            np.save(f, np.array(markers_by_frame, dtype=object))
+        MarkerStore.from_detections(markers_by_frame).save(self.marker_cache_file)
 
-    def bg_detect_surface_locations(
+    def bg_detect_surface_locations(  # noqa: C901
         self,
         uid: str,
     ) -> T.Generator[ProgressUpdate, None, None]:
@@ -868,24 +1115,57 @@ class SurfaceTrackingPlugin(Plugin):
             markers = self.markers_by_frame[starting_frame_idx]
             tracker_surf = Surface.from_apriltag_detections(uid, markers, self.camera)
 
-        locations = []
-        for frame_idx, markers in enumerate(self.markers_by_frame):
-            location = tracker_surf.localize(markers, self.camera)
-            locations.append(location)
-
-            yield ProgressUpdate((frame_idx + 1) / len(self.markers_by_frame))
-
-        locations_path = self.get_cache_path() / f"{uid}_locations.npy"
+        # frames are localized independently of each other, so chunks of frames
+        # are spread over a pool of threads. Each chunk writes its own rows of the
+        # cache arrays, so no per-frame location objects pile up. The surface is
+        # not known to be safe to share between threads, so every worker
+        # localizes with its own copy
+        n_frames = len(self.markers_by_frame)
+        chunk_size = 64
+        location_arrays = empty_location_arrays(n_frames)
+        thread_state = threading.local()
+
+        def localize_chunk(start_idx: int) -> int:
+            if not hasattr(thread_state, "surface"):
+                thread_state.surface = copy.deepcopy(tracker_surf)
+
+            stop_idx = min(start_idx + chunk_size, n_frames)
+            for frame_idx in range(start_idx, stop_idx):
+                markers = self.markers_by_frame[frame_idx]
+                location = thread_state.surface.localize(markers, self.camera)
+                if location is not None:
+                    location_arrays["detected"][frame_idx] = True
+                    location_arrays["transforms"][frame_idx] = location
+
+            return stop_idx - start_idx
+
+        n_workers = max(1, (os.cpu_count() or 2) // 2)
+        n_localized = 0
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for start_idx in range(0, n_frames, chunk_size):
+                pending.append(executor.submit(localize_chunk, start_idx))
+
+                # only a few chunks are queued ahead of the workers
+                if len(pending) >= 2 * n_workers:
+                    n_localized += pending.popleft().result()
+                    yield ProgressUpdate(n_localized / n_frames)
+
+            while pending:
+                n_localized += pending.popleft().result()
+                yield ProgressUpdate(n_localized / n_frames)
+
+        locations_path = self.get_cache_path() / f"{uid}_locations.npz"
         locations_path.parent.mkdir(parents=True, exist_ok=True)
         with locations_path.open("wb") as f:
-            np.save(f, np.array(locations, dtype=object))
+            np.savez(f, **location_arrays)
 
         surf_path = self.get_cache_path() / f"{uid}_surface.pkl"
         with surf_path.open("wb") as f:
             pickle.dump(tracker_surf, f)
 
-        visibility = np.array([1 if val else 0 for val in locations])
-        visibility = np.concatenate([[0], visibility])
+        visibility = np.zeros(n_frames + 1, dtype=np.int8)
+        visibility[1:] = location_arrays["detected"]
         viz_diff = np.diff(visibility)
         start_times = self.recording.scene.time[viz_diff == 1].tolist()
         stop_times = self.recording.scene.time[viz_diff == -1].tolist()
@@ -907,16 +1187,25 @@ class SurfaceTrackingPlugin(Plugin):
         stop_mask = self.recording.scene.time <= stop_time
         scene_frames = self.recording.scene[start_mask & stop_mask]
 
-        with plv.Writer(destination / f"{surface.name}_surface_view.mp4") as writer:
+        # every output frame is painted into the same image, which is cleared first
+        frame = QImage(
+            *surface.preview_options.render_size, QImage.Format.Format_BGR888
+        )
+        frame_pixels = ndarray_from_qimage(frame)
+        locations = self.surface_locations[uid]
+
+        # frames are encoded on a writer thread while the next ones are painted; a
+        # few frames may queue up before painting waits for the encoder
+        pending_writes = deque()
+        with (
+            plv.Writer(destination / f"{surface.name}_surface_view.mp4") as writer,
+            ThreadPoolExecutor(max_workers=1) as write_executor,
+        ):
             for output_idx, scene_frame in enumerate(scene_frames):
-                if scene_frame.index < len(self.surface_locations[uid]):
+                if scene_frame.index < len(locations):
                     rel_ts = (scene_frame.time - start_time) / 1e9
-                    frame = QImage(
-                        *surface.preview_options.render_size,
-                        QImage.Format.Format_BGR888,
-                    )
                     painter = QPainter(frame)
-                    surface.location = self.surface_locations[uid][scene_frame.index]
+                    surface.location = locations[scene_frame.index]
                     painter.fillRect(
                         0, 0, frame.width(), frame.height(), QColorConstants.Gray
                     )
@@ -924,14 +1213,20 @@ class SurfaceTrackingPlugin(Plugin):
 
                     painter.end()
 
-                    frame_pixels = ndarray_from_qimage(frame)
                     av_frame = av.VideoFrame.from_ndarray(frame_pixels, format="bgr24")
 
                     plv_frame = plv.VideoFrame(av_frame=av_frame, index=output_idx, time=rel_ts, source="")
-                    writer.write_frame(plv_frame)
+                    pending_writes.append(
+                        write_executor.submit(writer.write_frame, plv_frame)
+                    )
+                    if len(pending_writes) >= 4:
+                        pending_writes.popleft().result()
 
                 yield ProgressUpdate((output_idx + 1) / len(scene_frames))
 
+            while pending_writes:
+                pending_writes.popleft().result()
+
     @action
     @action_params(
         compact=True,
@@ -1006,10 +1301,11 @@ class SurfaceTrackingPlugin(Plugin):
 
     def _get_gazes_in_export_window(self):
         start_time, stop_time = neon_player.instance().recording_settings.export_window
-        start_mask = self.recording.gaze.time >= start_time
-        stop_mask = self.recording.gaze.time <= stop_time
+        gaze_time = self.recording.gaze.time
+        start_idx = np.searchsorted(gaze_time, start_time, side="left")
+        stop_idx = np.searchsorted(gaze_time, stop_time, side="right")
 
-        return self.recording.gaze[start_mask & stop_mask]
+        return self.recording.gaze[start_idx:stop_idx]
 
     def bg_export_surface_gazes(self, surface_uid: str, destination: Path):
         gazes_in_window = self._get_gazes_in_export_window()
@@ -1029,27 +1325,74 @@ class SurfaceTrackingPlugin(Plugin):
             )
 
 
+def empty_location_arrays(n_frames: int) -> dict[str, npt.NDArray]:
+    """Allocate the plain arrays that cache per-frame surface locations.
+
+    Frames without a location are flagged in `detected` and left as NaN in
+    `transforms`, which holds the image-to-surface and surface-to-image
+    homographies of each frame.
+    """
+    return {
+        "detected": np.zeros(n_frames, dtype=bool),
+        "transforms": np.full((n_frames, 2, 3, 3), np.nan, dtype=np.float64),
+    }
+
+
+def locations_to_arrays(locations: T.Sequence) -> dict[str, npt.NDArray]:
+    arrays = empty_location_arrays(len(locations))
+    for frame_idx, location in enumerate(locations):
+        if location is not None:
+            arrays["detected"][frame_idx] = True
+            arrays["transforms"][frame_idx] = [
+                np.asarray(transform, dtype=np.float64) for transform in location
+            ]
+
+    return arrays
+
+
+def arrays_to_locations(arrays: T.Mapping[str, npt.NDArray]) -> list:
+    transforms = arrays["transforms"]
+
+    return [
+        (transforms[frame_idx, 0], transforms[frame_idx, 1]) if detected else None
+        for frame_idx, detected in enumerate(arrays["detected"])
+    ]
+
+
+def qpoints_from_array(points: npt.NDArray) -> list[QPointF]:
+    # unpacking Python floats is much cheaper than unpacking numpy array rows
+    return list(starmap(QPointF, np.asarray(points, dtype=np.float64).tolist()))
+
+
 def insert_interpolated_points(points: npt.NDArray, n_between: int = 10) -> npt.NDArray:
+    """Close a polygon and insert evenly spaced points along each of its edges.
+
+    `points` may carry leading batch dimensions, e.g. `(n_polygons, n_pts, dim)`,
+    in which case all polygons are interpolated in the same pass.
+    """
     points = np.asarray(points, dtype=float)
-    points = np.concatenate((points, points[0:1]), axis=0)
 
-    n_pts, dim = points.shape
-    if n_pts < 2:
+    *batch_shape, n_pts, dim = points.shape
+    if n_pts < 1:
         return points.copy()
 
-    t = np.linspace(0, 1, n_between + 2)[:, None]
+    t = np.linspace(0, 1, n_between + 1, endpoint=False)[:, None]
+
+    # Edge vectors, including the closing edge back to the first point, so the
+    # polygon is closed without building a copy of it with the first point appended
+    edges = np.empty_like(points)
+    np.subtract(points[..., 1:, :], points[..., :-1, :], out=edges[..., :-1, :])
+    np.subtract(points[..., 0, :], points[..., -1, :], out=edges[..., -1, :])
 
-    out_len = n_pts + (n_pts - 1) * n_between
-    out = np.empty((out_len, dim), dtype=float)
+    out_len = n_pts * (n_between + 1) + 1
+    out = np.empty((*batch_shape, out_len, dim), dtype=float)
 
-    idx = 0
-    for i in range(n_pts - 1):
-        p0, p1 = points[i], points[i + 1]
-        segment = (1 - t) * p0 + t * p1
-        out[idx : idx + n_between + 1] = segment[:-1]
-        idx += n_between + 1
+    # Interpolate all edges at once, writing straight into the output buffer
+    segments = out[..., :-1, :].reshape(*batch_shape, n_pts, n_between + 1, dim)
+    np.multiply(t, edges[..., None, :], out=segments)
+    segments += points[..., None, :]
 
-    # Append the final original point
-    out[-1] = points[-1]
+    # Close the polygon with the first point
+    out[..., -1, :] = points[..., 0, :]
 
     return out
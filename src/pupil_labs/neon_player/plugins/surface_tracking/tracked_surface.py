@@ -168,6 +168,9 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
         self.tracker_surface = None
 
         self._location = None
+        self._surface_image_cache = None
+        self._surface_image_maps = None
+        self._scene_gaze_cache = None
 
         self.preview_window = None
         self.handle_widgets = {}
@@ -247,17 +250,34 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
 
     @location.setter
     def location(self, value):#: SurfaceLocation | None) -> None:
-        if self._location is not None and value is not None:
-            i2sA, s2iA = self._location
-            i2sB, s2iB = value
-            if np.all(i2sA == i2sB) and np.all(s2iA == s2iB):
-                return
+        # the surface staying undetected is not a change either
+        if value is None and self._location is None:
+            return
+
+        # cached locations are shared tuples, so repeated frames are caught by
+        # identity; otherwise ignore changes below numerical noise
+        if (
+            self._location is not None
+            and value is not None
+            and (
+                value is self._location
+                or all(
+                    np.array_equal(a, b) or np.allclose(a, b, rtol=1e-9, atol=0.0)
+                    for a, b in zip(self._location, value, strict=True)
+                )
+            )
+        ):
+            return
 
         self._location = value
         self.surface_location_changed.emit()
         self.update_handle_positions()
 
     def update_handle_positions(self) -> None:
+        # handles only exist while editing; otherwise there is nothing to place
+        if not self.handle_widgets:
+            return
+
         if self._location is None:
             for w in self.handle_widgets.values():
                 w.hide()
@@ -266,8 +286,7 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
         for w in self.handle_widgets.values():
             w.show()
 
-        tracker_plugin = Plugin.get_instance_by_name("SurfaceTrackingPlugin")
-        camera = tracker_plugin.camera
+        camera = self.tracker_plugin.camera
 
         undistorted_corners = perspective_transform(
             normalized_corners(),
@@ -286,9 +305,7 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
             w.set_scene_pos(distorted_corner)
 
     def recalculate_heatmap(self) -> None:
-        Plugin.get_instance_by_name("SurfaceTrackingPlugin").recalculate_heatmap(
-            self.uid
-        )
+        self.tracker_plugin.recalculate_heatmap(self.uid)
 
     @property
     def name(self) -> str:
@@ -316,7 +333,7 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
             self.tracker_plugin.add_surface_gaze_timeline(self)
 
     def on_corner_changed(self, corner_id, pos) -> None:
-        camera = Plugin.get_instance_by_name("SurfaceTrackingPlugin").camera
+        camera = self.tracker_plugin.camera
 
         corners = [tuple(v) for v in normalized_corners().tolist()]
         pos = np.array([pos.x(), pos.y()])
@@ -420,26 +437,32 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
         self._preview_options = value
 
     def map_points_by_time(self, points, timestamps):
-        mapped_points = []
         surface_locations = self.tracker_plugin.surface_locations[self.uid]
 
-        points = np.array(points)
-        timestamps = np.array(timestamps)
-
-        for point, timestamp in zip(points, timestamps):
-            scene_idx = self.tracker_plugin.get_scene_idx_for_time(timestamp)
-            if 0 <= scene_idx < len(surface_locations):
-                location = surface_locations[scene_idx]
-                if location is not None:
-                    mapped_point = perspective_transform(
-                        point.reshape(1, 2), location[0]
-                    )[0]
-                    mapped_points.append(mapped_point)
-                    continue
-
-            mapped_points.append((np.nan, np.nan))
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        timestamps = np.asarray(timestamps)
+
+        # every point is mapped with the location of the last scene frame at or
+        # before its timestamp; frames are looked up once and the homographies of
+        # all points are applied in a single pass. Frames without a location map
+        # their points to NaN
+        scene_time = self.tracker_plugin.recording.scene.time
+        scene_idxs = np.searchsorted(scene_time, timestamps, side="right") - 1
+        scene_idxs[scene_idxs >= len(surface_locations)] = -1
+
+        frame_idxs, point_frames = np.unique(scene_idxs, return_inverse=True)
+        homographies = np.full((len(frame_idxs), 3, 3), np.nan)
+        for idx, scene_idx in enumerate(frame_idxs.tolist()):
+            if scene_idx >= 0 and surface_locations[scene_idx] is not None:
+                homographies[idx] = surface_locations[scene_idx][0]
+
+        homogeneous = np.einsum(
+            "nij,nj->ni",
+            homographies[point_frames.ravel()],
+            np.column_stack((points, np.ones(len(points)))),
+        )
 
-        return np.array(mapped_points)
+        return homogeneous[:, :2] / homogeneous[:, 2:]
 
     def image_points_to_surface(self, points):
         if len(points) == 0:
@@ -447,13 +470,12 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
         return perspective_transform(points, self.location[0])
 
     def apply_offset_and_map_gazes(self, gazes):
-        try:
-            gaze_plugin = Plugin.get_instance_by_name("GazeDataPlugin")
-        except KeyError:
+        gaze_plugin = Plugin.get_instance_by_name("GazeDataPlugin")
+        if gaze_plugin is None:
             logging.warning(
                 "Surface fixations export requires gaze and fixations plugins."
             )
-            return
+            return None
 
         offset_gazes = gazes.point + np.array([
             gaze_plugin.offset_x * gaze_plugin.recording.scene.width,
@@ -506,25 +528,41 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
         fixation_data["fixation x [normalized]"] = mapped_fixation_points[:, 0]
         fixation_data["fixation y [normalized]"] = mapped_fixation_points[:, 1]
 
-        fixations_on_surfs = []
-        for idx, fixation in enumerate(fixation_data.iterrows()):
-            start_mask = gazes.time >= fixation[1]["start timestamp [ns]"]
-            end_mask = gazes.time <= fixation[1]["end timestamp [ns]"]
-            fixation_gazes = gazes[start_mask & end_mask]
-
-            if not fixation_gazes.size:
-                fixations_on_surfs.append(0)
-                continue
-
-            mapped_gazes = self.apply_offset_and_map_gazes(fixation_gazes)
-
-            lower_pass = np.all(mapped_gazes >= 0, axis=1)
-            upper_pass = np.all(mapped_gazes <= 1.0, axis=1)
-            gazes_on_surface = lower_pass & upper_pass
+        # every gaze is mapped to the surface once; each fixation then averages the
+        # on-surface flags of its own time range of gazes
+        mapped_gazes = self.apply_offset_and_map_gazes(gazes)
+        if mapped_gazes is None:
+            # the file is still written, only without the gaze based column
+            logging.warning(
+                f"No gaze data for surface {self.name}, fixations are exported "
+                "without on-surface detection."
+            )
+            fixation_data["fixation detected on surface"] = np.nan
 
-            fixations_on_surfs.append(np.mean(gazes_on_surface))
+        else:
+            mapped_gazes = mapped_gazes.reshape(-1, 2)
+            gazes_on_surface = np.all(
+                (mapped_gazes >= 0) & (mapped_gazes <= 1.0), axis=1
+            )
+            on_surface_counts = np.concatenate(([0], np.cumsum(gazes_on_surface)))
 
-        fixation_data["fixation detected on surface"] = fixations_on_surfs
+            start_idxs = np.searchsorted(
+                gazes.time,
+                fixation_data["start timestamp [ns]"].to_numpy(),
+                side="left",
+            )
+            stop_idxs = np.searchsorted(
+                gazes.time,
+                fixation_data["end timestamp [ns]"].to_numpy(),
+                side="right",
+            )
+            gaze_counts = stop_idxs - start_idxs
+            fixation_data["fixation detected on surface"] = np.where(
+                gaze_counts > 0,
+                (on_surface_counts[stop_idxs] - on_surface_counts[start_idxs])
+                / np.maximum(gaze_counts, 1),
+                0,
+            )
 
         # drop unused columns
         fixation_data = fixation_data.drop(
@@ -548,26 +586,18 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
         if time_in_recording == -1:
             time_in_recording = neon_player.instance().current_ts
 
-        camera = self.tracker_plugin.camera
-        gaze_plugin = Plugin.get_instance_by_name("GazeDataPlugin")
-
         app = neon_player.instance()
-        scene_idx = gaze_plugin.get_scene_idx_for_time(time_in_recording)
-        scene_frame = app.recording.scene[scene_idx]
-        undistorted_image = camera.undistort_image(scene_frame.bgr)
-        surface_image = utils.crop_image(
-            undistorted_image,
-            self.location[1],
-            width=self.preview_options.render_size[0],
-            height=None,
-        )
-
-        surface_image = surface_image[:self.preview_options.render_size[1], :self.preview_options.render_size[0]]
+        scene_idx = self.tracker_plugin.get_scene_idx_for_time(time_in_recording)
+        surface_image = self._get_surface_image(scene_idx)
         painter.drawImage(0, 0, qimage_from_frame(surface_image))
 
-        gazes = gaze_plugin.get_gazes_for_scene(scene_idx).point
-        if len(gazes) > 0:
-            gazes = camera.undistort_points(gazes)
+        # plugins are recreated when they are toggled, so the gaze plugin is
+        # looked up on every render
+        gaze_plugin = Plugin.get_instance_by_name("GazeDataPlugin")
+        if gaze_plugin is None:
+            return
+
+        gazes = self._get_undistorted_scene_gazes(gaze_plugin, scene_idx)
 
         mapped_gazes = self.image_points_to_surface(gazes)
         mapped_gazes[:, 0] *= self.preview_options.render_size[0]
@@ -581,8 +611,8 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
             if viz.use_offset:
                 if offset_gazes is None:
                     offset_gazes = gazes + np.array([
-                        gaze_plugin.offset_x * scene_frame.width,
-                        gaze_plugin.offset_y * scene_frame.height,
+                        gaze_plugin.offset_x * app.recording.scene.width,
+                        gaze_plugin.offset_y * app.recording.scene.height,
                     ])
                     mapped_offset_gazes = self.image_points_to_surface(offset_gazes)
                     mapped_offset_gazes[:, 0] *= self.preview_options.render_size[0]
@@ -599,6 +629,101 @@ class TrackedSurface(PersistentPropertiesMixin, QObject):
             aggregation_dict = offset_aggregations if viz.use_offset else aggregations
             viz.render(painter, aggregation_dict[viz._aggregation])
 
+    def _get_undistorted_scene_gazes(self, gaze_plugin, scene_idx: int) -> np.ndarray:
+        # the gazes of a scene frame don't change between repaints, only the
+        # surface they are mapped onto does
+        if self._scene_gaze_cache is not None:
+            cached_scene_idx, cached_gazes = self._scene_gaze_cache
+            if cached_scene_idx == scene_idx:
+                return cached_gazes
+
+        gazes = gaze_plugin.get_gazes_for_scene(scene_idx).point
+        if len(gazes) > 0:
+            gazes = self.tracker_plugin.camera.undistort_points(gazes)
+
+        self._scene_gaze_cache = (scene_idx, gazes)
+
+        return gazes
+
+    def _get_surface_image(self, scene_idx: int) -> np.ndarray:
+        # repaints of the same frame (e.g. resizes or UI redraws) reuse the last
+        # surface image instead of decoding and warping the scene frame again
+        render_size = tuple(self.preview_options.render_size)
+        cache_key = (scene_idx, render_size, self.location[1].tobytes())
+        if self._surface_image_cache is not None:
+            cached_key, cached_image = self._surface_image_cache
+            if cached_key == cache_key:
+                return cached_image
+
+        scene_frame = neon_player.instance().recording.scene[scene_idx]
+        surface_image = cv2.remap(
+            scene_frame.bgr,
+            *self._get_surface_image_maps(render_size),
+            interpolation=cv2.INTER_LINEAR,
+            borderMode=cv2.BORDER_CONSTANT,
+        )
+
+        self._surface_image_cache = (cache_key, surface_image)
+
+        return surface_image
+
+    def _get_surface_image_maps(self, render_size: tuple[int, int]) -> tuple:
+        # maps every surface image pixel straight to its distorted scene pixel, so
+        # undistorting and cropping resample the scene frame only once
+        cache_key = (render_size, self.location[1].tobytes())
+        if self._surface_image_maps is not None:
+            cached_key, cached_maps = self._surface_image_maps
+            if cached_key == cache_key:
+                return cached_maps
+
+        # the surface image is laid out like utils.crop_image at the render width,
+        # with the height following the surface's projected aspect in this frame,
+        # and is then cut to the render size
+        width = render_size[0]
+        crop_height = utils.crop_image(
+            np.zeros((1, 1, 3), np.uint8),
+            self.location[1],
+            width=width,
+            height=None,
+        ).shape[0]
+        height = min(crop_height, render_size[1])
+
+        xs = np.arange(width) / width
+        ys = np.arange(height) / crop_height
+        surface_points = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+        undistorted_points = perspective_transform(surface_points, self.location[1])
+        undistorted_points = undistorted_points.reshape(height, width, 2).astype(
+            np.float32
+        )
+
+        lookup_maps = self.tracker_plugin.distortion_lookup_maps
+        map_x, map_y = (
+            cv2.remap(
+                lookup_map,
+                undistorted_points,
+                None,
+                interpolation=cv2.INTER_LINEAR,
+                borderMode=cv2.BORDER_REPLICATE,
+            )
+            for lookup_map in lookup_maps
+        )
+
+        # points outside of the undistorted scene image have no scene pixel. They
+        # are masked here rather than through the remap's border value, which
+        # would be blended into the coordinates of samples next to the edge
+        lookup_height, lookup_width = lookup_maps[0].shape
+        x, y = undistorted_points[..., 0], undistorted_points[..., 1]
+        outside = ~(
+            (x >= 0) & (x <= lookup_width - 1) & (y >= 0) & (y <= lookup_height - 1)
+        )
+        map_x[outside] = -1
+        map_y[outside] = -1
+        maps = cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+
+        self._surface_image_maps = (cache_key, maps)
+
+        return maps
+
     @action
     @action_params(
         compact=True,
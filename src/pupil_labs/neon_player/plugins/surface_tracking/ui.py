@@ -148,6 +148,9 @@ class SurfaceViewWidget(VideoRenderWidget):
         self.update()
 
     def paintEvent(self, event: QPaintEvent) -> None:
+        if self.size().isEmpty() or not event.region().intersects(self.rect()):
+            return
+
         painter = QPainter(self)
         if self.tracker_plugin.is_time_gray() or self.surface.location is None:
             painter.fillRect(0, 0, self.width(), self.height(), Qt.GlobalColor.gray)
@@ -57,8 +57,8 @@ def unproject_points(
     :return: Array of unprojected 3d points, shape: Nx3
     """
     # Convert type to numpy arrays (OpenCV requirements)
-    camera_matrix = np.array(camera_matrix)
-    distortion_coefs = np.array(distortion_coefs)
+    camera_matrix = np.asarray(camera_matrix)
+    distortion_coefs = np.asarray(distortion_coefs)
     points_2d = np.asarray(points_2d, dtype=np.float32)
 
     # Add third dimension the way cv2 wants it
@@ -66,9 +66,12 @@ def unproject_points(
 
     # Undistort 2d pixel coordinates
     points_2d_undist = cv2.undistortPoints(points_2d, camera_matrix, distortion_coefs)
-    # Unproject 2d points into 3d directions; all points. have z=1
-    points_3d = cv2.convertPointsToHomogeneous(points_2d_undist)
-    points_3d.shape = -1, 3
+
+    # Unproject 2d points into 3d directions; all points have z=1. Writing into a
+    # single preallocated buffer avoids the extra copy of convertPointsToHomogeneous
+    points_3d = np.empty((len(points_2d_undist), 3), dtype=np.float32)
+    points_3d[:, :2] = points_2d_undist.reshape(-1, 2)
+    points_3d[:, 2] = 1.0
 
     if normalize:
         # normalize vector length to 1
@@ -0,0 +1,57 @@
+from itertools import pairwise
+
+import pytest
+
+from pupil_labs.neon_player.job_manager import (
+    MIN_PROGRESS_STEP,
+    ProgressUpdate,
+    throttle_progress,
+)
+
+
+def per_frame_updates(n_frames: int) -> list[ProgressUpdate]:
+    return [ProgressUpdate((idx + 1) / n_frames) for idx in range(n_frames)]
+
+
+def test_throttle_progress_empty():
+    assert list(throttle_progress([])) == []
+
+
+def test_throttle_progress_single_update():
+    update = ProgressUpdate(0.3)
+    assert list(throttle_progress([update])) == [update]
+
+
+def test_throttle_progress_keeps_visible_steps():
+    updates = per_frame_updates(30_000)
+    throttled = list(throttle_progress(updates))
+
+    # what an unthrottled consumer would have shown at the end
+    assert throttled[-1] is updates[-1]
+    assert throttled[0] is updates[0]
+    assert len(throttled) <= 1 / MIN_PROGRESS_STEP + 2
+
+    # a subsequence of the original updates, with no visible step skipped
+    index_by_id = {id(update): idx for idx, update in enumerate(updates)}
+    positions = [index_by_id[id(update)] for update in throttled]
+    assert positions == sorted(positions)
+    for previous, current in pairwise(throttled):
+        assert current.progress - previous.progress < 2 * MIN_PROGRESS_STEP
+
+
+def test_throttle_progress_forces_final_update():
+    updates = [ProgressUpdate(0.5), ProgressUpdate(0.501), ProgressUpdate(0.502)]
+    throttled = list(throttle_progress(updates))
+
+    assert throttled == [updates[0], updates[-1]]
+
+
+@pytest.mark.parametrize("progress", [1.0, 0.5])
+def test_throttle_progress_keeps_completion_and_data(progress):
+    updates = [
+        ProgressUpdate(0.5),
+        ProgressUpdate(progress, datum="result"),
+        ProgressUpdate(1.0),
+    ]
+
+    assert list(throttle_progress(updates)) == updates
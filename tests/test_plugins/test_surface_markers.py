@@ -0,0 +1,98 @@
+import numpy as np
+import pupil_apriltags
+import pytest
+
+from pupil_labs.neon_player.plugins.surface_tracking.markers import MarkerStore
+
+
+def make_detection(tag_id: int, offset: float) -> pupil_apriltags.Detection:
+    detection = pupil_apriltags.Detection()
+    detection.tag_id = tag_id
+    detection.hamming = tag_id % 2
+    detection.decision_margin = 40.0 + tag_id
+    detection.homography = np.eye(3) * (tag_id + 1)
+    detection.corners = np.array([
+        [offset, offset],
+        [offset + 10, offset],
+        [offset + 10, offset + 10],
+        [offset, offset + 10],
+    ])
+    # the detector's center is not the corner mean under perspective
+    detection.center = detection.corners.mean(axis=0) + 0.5
+
+    return detection
+
+
+@pytest.fixture
+def detections_by_frame():
+    return [
+        [make_detection(3, 0.0), make_detection(7, 50.0)],
+        [],
+        [make_detection(7, 20.0)],
+    ]
+
+
+def test_marker_store_round_trip(tmp_path, detections_by_frame):
+    path = tmp_path / "markers.npz"
+    MarkerStore.from_detections(detections_by_frame).save(path)
+    store = MarkerStore.load(path)
+
+    assert len(store) == 3
+    assert store.counts().tolist() == [2, 0, 1]
+
+    for frame_idx, frame_detections in enumerate(detections_by_frame):
+        loaded = store[frame_idx]
+        assert len(loaded) == len(frame_detections)
+        for original, restored in zip(frame_detections, loaded, strict=True):
+            assert restored.tag_id == original.tag_id
+            assert restored.hamming == original.hamming
+            assert restored.decision_margin == pytest.approx(original.decision_margin)
+            np.testing.assert_allclose(restored.homography, original.homography)
+            np.testing.assert_allclose(restored.corners, original.corners)
+            np.testing.assert_allclose(restored.center, original.center)
+
+
+def test_marker_store_frame_accessors(detections_by_frame):
+    store = MarkerStore.from_detections(detections_by_frame)
+
+    assert store.ids_for_frame(0).tolist() == [3, 7]
+    np.testing.assert_allclose(store.centers_for_frame(0), [[5.5, 5.5], [55.5, 55.5]])
+    np.testing.assert_allclose(store.corner_centers_for_frame(0), [[5, 5], [55, 55]])
+    assert store.corners_for_frame(2).shape == (1, 4, 2)
+
+
+def test_marker_store_empty_frames(detections_by_frame):
+    store = MarkerStore.from_detections(detections_by_frame)
+
+    assert store[1] == []
+    assert store.ids_for_frame(1).shape == (0,)
+    assert store.centers_for_frame(1).shape == (0, 2)
+    assert store.corner_centers_for_frame(1).shape == (0, 2)
+    assert store.corners_for_frame(1).shape == (0, 4, 2)
+
+    empty = MarkerStore.empty()
+    assert len(empty) == 0
+    assert empty.counts().shape == (0,)
+
+
+def test_marker_store_negative_indices(detections_by_frame):
+    store = MarkerStore.from_detections(detections_by_frame)
+
+    assert store.ids_for_frame(-1).tolist() == [7]
+    assert [d.tag_id for d in store[-3]] == [3, 7]
+
+    with pytest.raises(IndexError):
+        store[3]
+
+    with pytest.raises(IndexError):
+        store.ids_for_frame(-4)
+
+
+def test_marker_store_load_without_corner_centers(tmp_path, detections_by_frame):
+    store = MarkerStore.from_detections(detections_by_frame)
+    arrays = {k: v for k, v in vars(store).items() if k != "corner_centers"}
+    path = tmp_path / "markers.npz"
+    np.savez(path, **arrays)
+
+    loaded = MarkerStore.load(path)
+    np.testing.assert_allclose(loaded.corner_centers, store.corner_centers)
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from pupil_labs.neon_player.plugins.surface_tracking.surface_tracking import (
+    arrays_to_locations,
+    insert_interpolated_points,
+    locations_to_arrays,
+)
+
+
+def reference_insert_interpolated_points(points, n_between=10):
+    # the original segment-by-segment implementation
+    points = np.asarray(points, dtype=float)
+    points = np.concatenate((points, points[0:1]), axis=0)
+
+    n_pts, dim = points.shape
+    if n_pts < 2:
+        return points.copy()
+
+    t = np.linspace(0, 1, n_between + 2)[:, None]
+
+    out = np.empty((n_pts + (n_pts - 1) * n_between, dim), dtype=float)
+    idx = 0
+    for i in range(n_pts - 1):
+        segment = (1 - t) * points[i] + t * points[i + 1]
+        out[idx : idx + n_between + 1] = segment[:-1]
+        idx += n_between + 1
+
+    out[-1] = points[-1]
+
+    return out
+
+
+@pytest.mark.parametrize("n_points", [1, 2, 4, 7])
+@pytest.mark.parametrize("n_between", [0, 1, 10])
+def test_insert_interpolated_points_matches_loop(n_points, n_between):
+    points = np.random.default_rng(n_points).uniform(0, 1600, (n_points, 2))
+
+    np.testing.assert_allclose(
+        insert_interpolated_points(points, n_between),
+        reference_insert_interpolated_points(points, n_between),
+    )
+
+
+def test_insert_interpolated_points_empty():
+    result = insert_interpolated_points(np.empty((0, 2)))
+
+    assert result.shape == (0, 2)
+
+
+def test_insert_interpolated_points_batched():
+    polygons = np.random.default_rng(0).uniform(0, 1600, (5, 4, 2))
+    result = insert_interpolated_points(polygons, 10)
+
+    assert result.shape == (5, 4 * 11 + 1, 2)
+    for polygon, interpolated in zip(polygons, result, strict=True):
+        np.testing.assert_allclose(
+            interpolated, reference_insert_interpolated_points(polygon, 10)
+        )
+
+
+def test_insert_interpolated_points_closes_polygon():
+    corners = np.array([[0, 0], [10, 0], [10, 10], [0, 10]])
+    result = insert_interpolated_points(corners, 1)
+
+    np.testing.assert_allclose(result[0], corners[0])
+    np.testing.assert_allclose(result[-1], corners[0])
+    np.testing.assert_allclose(result[1], [5, 0])
+    np.testing.assert_allclose(result[-2], [0, 5])
+
+
+@pytest.mark.parametrize("with_missing", [True, False])
+def test_legacy_locations_round_trip(tmp_path, with_missing):
+    rng = np.random.default_rng(0)
+    locations = []
+    for _ in range(4):
+        img2surf = rng.normal(size=(3, 3))
+        locations.append((img2surf, np.linalg.inv(img2surf)))
+
+    if with_missing:
+        locations[1] = None
+
+    # older caches pickled the location tuples into an object array, which numpy
+    # turns into a 4d object array when no frame is missing
+    legacy_path = tmp_path / "locations.npy"
+    np.save(legacy_path, np.array(locations, dtype=object))
+    arrays = locations_to_arrays(np.load(legacy_path, allow_pickle=True))
+
+    restored = arrays_to_locations(arrays)
+    assert len(restored) == len(locations)
+    for original, location in zip(locations, restored, strict=True):
+        if original is None:
+            assert location is None
+        else:
+            np.testing.assert_allclose(location[0], original[0])
+            np.testing.assert_allclose(location[1], original[1])
@@ -0,0 +1,179 @@
+from functools import partial
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+
+from pupil_labs.neon_player import Plugin
+from pupil_labs.neon_player.plugins.surface_tracking.tracked_surface import (
+    TrackedSurface,
+)
+
+SCENE_TIME = np.arange(10, dtype=np.int64) * 50_000_000
+
+
+def make_location(rng):
+    img2surf = np.eye(3) + rng.normal(0, 1e-3, (3, 3))
+    return img2surf, np.linalg.inv(img2surf)
+
+
+def make_surface(surface_locations):
+    def get_scene_idx_for_time(t):
+        # the original backward match, one timestamp at a time
+        earlier = np.flatnonzero(t >= SCENE_TIME)
+        return int(earlier[-1]) if len(earlier) else -1
+
+    tracker_plugin = SimpleNamespace(
+        surface_locations={"surface": surface_locations},
+        recording=SimpleNamespace(scene=SimpleNamespace(time=SCENE_TIME)),
+        get_scene_idx_for_time=get_scene_idx_for_time,
+    )
+
+    return SimpleNamespace(uid="surface", tracker_plugin=tracker_plugin)
+
+
+def reference_map_points_by_time(surface, points, timestamps):
+    # the original point-by-point implementation
+    surface_locations = surface.tracker_plugin.surface_locations[surface.uid]
+    mapped_points = []
+    for point, timestamp in zip(np.array(points), np.array(timestamps), strict=True):
+        scene_idx = surface.tracker_plugin.get_scene_idx_for_time(timestamp)
+        if 0 <= scene_idx < len(surface_locations):
+            location = surface_locations[scene_idx]
+            if location is not None:
+                mapped_point = cv2.perspectiveTransform(
+                    point.reshape(1, 1, 2), location[0]
+                )
+                mapped_points.append(mapped_point[0, 0])
+                continue
+
+        mapped_points.append((np.nan, np.nan))
+
+    return np.array(mapped_points).reshape(-1, 2)
+
+
+@pytest.fixture
+def surface():
+    rng = np.random.default_rng(0)
+    # fewer locations than scene frames, some of them missing
+    locations = [make_location(rng) for _ in range(8)]
+    locations[2] = None
+    locations[5] = None
+
+    return make_surface(locations)
+
+
+def test_map_points_by_time_matches_loop(surface):
+    rng = np.random.default_rng(1)
+    timestamps = np.sort(rng.integers(SCENE_TIME[0], SCENE_TIME[-1], 200))
+    points = rng.uniform(0, 1600, (200, 2))
+
+    np.testing.assert_allclose(
+        TrackedSurface.map_points_by_time(surface, points, timestamps),
+        reference_map_points_by_time(surface, points, timestamps),
+    )
+
+
+def test_map_points_by_time_outside_location_range(surface):
+    timestamps = np.array([
+        SCENE_TIME[0] - 1,  # before the first scene frame
+        SCENE_TIME[2],  # frame without a location
+        SCENE_TIME[8],  # frame past the end of the locations
+        SCENE_TIME[-1] + 10**9,  # after the last scene frame
+        SCENE_TIME[3],  # frame with a location, exactly on its timestamp
+    ])
+    points = np.full((len(timestamps), 2), 800.0)
+
+    mapped = TrackedSurface.map_points_by_time(surface, points, timestamps)
+
+    assert np.isnan(mapped[:4]).all()
+    assert np.isfinite(mapped[4]).all()
+    np.testing.assert_allclose(
+        mapped, reference_map_points_by_time(surface, points, timestamps)
+    )
+
+
+def test_map_points_by_time_single_point(surface):
+    points = np.array([[100.0, 200.0]])
+    timestamps = np.array([SCENE_TIME[1] + 5])
+
+    np.testing.assert_allclose(
+        TrackedSurface.map_points_by_time(surface, points, timestamps),
+        reference_map_points_by_time(surface, points, timestamps),
+    )
+
+
+def test_map_points_by_time_empty(surface):
+    mapped = TrackedSurface.map_points_by_time(
+        surface, np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    )
+
+    assert mapped.shape == (0, 2)
+
+
+@pytest.fixture
+def exporting_surface(surface):
+    surface.name = "surface"
+    for method in ("map_points_by_time", "apply_offset_and_map_gazes"):
+        setattr(surface, method, partial(getattr(TrackedSurface, method), surface))
+
+    return surface
+
+
+def use_plugins(monkeypatch, **plugins):
+    monkeypatch.setattr(Plugin, "get_instance_by_name", staticmethod(plugins.get))
+
+
+def make_fixations_plugin():
+    fixations = pd.DataFrame({
+        "recording id": "recording",
+        "fixation id": [1, 2],
+        "start timestamp [ns]": [SCENE_TIME[1], SCENE_TIME[3]],
+        "end timestamp [ns]": [SCENE_TIME[1] + 30_000_000, SCENE_TIME[3] + 30_000_000],
+        "fixation x [px]": [0.5, 0.5],
+        "fixation y [px]": [0.5, 0.5],
+        "azimuth [deg]": [0.0, 0.0],
+        "elevation [deg]": [0.0, 0.0],
+    })
+
+    return SimpleNamespace(get_export_fixations=fixations.copy)
+
+
+def make_gazes():
+    # four gazes during the first fixation, three of them on the surface, and
+    # none during the second
+    time = SCENE_TIME[1] + np.array([0, 10_000_000, 20_000_000, 30_000_000])
+    point = np.array([[0.5, 0.5], [0.2, 0.8], [5.0, 5.0], [0.9, 0.1]])
+
+    return SimpleNamespace(time=time, point=point)
+
+
+def test_export_fixations_on_surface_fraction(exporting_surface, monkeypatch, tmp_path):
+    gaze_plugin = SimpleNamespace(
+        offset_x=0.0,
+        offset_y=0.0,
+        recording=SimpleNamespace(scene=SimpleNamespace(width=1600, height=1200)),
+    )
+    use_plugins(
+        monkeypatch,
+        FixationsPlugin=make_fixations_plugin(),
+        GazeDataPlugin=gaze_plugin,
+    )
+
+    TrackedSurface.export_fixations(exporting_surface, make_gazes(), tmp_path)
+    exported = pd.read_csv(tmp_path / "fixations_on_surface_surface.csv")
+
+    assert exported["fixation detected on surface"].tolist() == [0.75, 0.0]
+    assert "fixation x [px]" not in exported.columns
+
+
+def test_export_fixations_without_gaze_plugin(exporting_surface, monkeypatch, tmp_path):
+    use_plugins(monkeypatch, FixationsPlugin=make_fixations_plugin())
+
+    TrackedSurface.export_fixations(exporting_surface, make_gazes(), tmp_path)
+    exported = pd.read_csv(tmp_path / "fixations_on_surface_surface.csv")
+
+    assert exported["fixation detected on surface"].isna().all()
+    assert np.isfinite(exported["fixation x [normalized]"]).all()